@@ -0,0 +1,136 @@
+import os
+import argparse
+
+# Отпечаток должен зависеть только от содержимого файла, поэтому алгоритмы
+# фиксированы: чанкинг FastCDC и хеш BLAKE3, без запасных вариантов
+from fastcdc import fastcdc
+from blake3 import blake3
+
+# Размеры чанков: средний 64 КиБ, границы в 4 раза меньше и больше
+AVG_CHUNK_SIZE = 64 * 1024
+MIN_CHUNK_SIZE = AVG_CHUNK_SIZE // 4
+MAX_CHUNK_SIZE = AVG_CHUNK_SIZE * 4
+
+SUPPORTED_FORMATS = ('.glb', '.stl')
+
+
+# Префиксы узлов дерева Меркла: лист (чанк) и внутренний узел
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+def hash_chunk(data):
+    """Хеш листа дерева Меркла: BLAKE3 от префикса листа и данных чанка."""
+    hasher = blake3(LEAF_PREFIX)
+    hasher.update(data)
+    return hasher.digest()
+
+
+def iter_chunks(file_path):
+    """
+    Нарезает файл на чанки FastCDC.
+
+    Границы чанков определяются содержимым, поэтому одинаковые фрагменты
+    разных файлов (например, текстуры внутри GLB) дают одинаковые чанки
+    даже при сдвиге. Пустой файл не дает ни одного чанка.
+    """
+    # fastcdc отображает файл в память, а пустой файл отобразить нельзя
+    if os.path.getsize(file_path) == 0:
+        return
+
+    for chunk in fastcdc(
+            file_path,
+            min_size=MIN_CHUNK_SIZE,
+            avg_size=AVG_CHUNK_SIZE,
+            max_size=MAX_CHUNK_SIZE,
+            fat=True
+    ):
+        yield chunk.data
+
+
+def chunk_digests(file_path):
+    """Список (хеш чанка, размер чанка) в порядке следования в файле."""
+    return [(hash_chunk(chunk), len(chunk)) for chunk in iter_chunks(file_path)]
+
+
+def merkle_root(digests):
+    """
+    Корень дерева Меркла над хешами чанков.
+
+    Листья и внутренние узлы хешируются с разными префиксами, поэтому хеш
+    узла не совпадает с хешем чанка. Корень файла из одного чанка равен хешу
+    этого листа. Непарный узел поднимается на уровень выше без изменений.
+    Пустой файл дает хеш пустого листа.
+    """
+    if not digests:
+        return hash_chunk(b"")
+
+    level = list(digests)
+    while len(level) > 1:
+        next_level = [
+            blake3(NODE_PREFIX + level[i] + level[i + 1]).digest()
+            for i in range(0, len(level) - 1, 2)
+        ]
+        if len(level) % 2:
+            next_level.append(level[-1])
+        level = next_level
+    return level[0]
+
+
+def fingerprint(file_path):
+    """
+    Контентный отпечаток файла (bytes): корень дерева Меркла по хешам чанков.
+
+    MD5 остается идентификатором файла в именах рендеров, отпечаток нужен
+    для дедупликации на уровне чанков.
+    """
+    return merkle_root([digest for digest, _ in chunk_digests(file_path)])
+
+
+def analyze_directory(directory):
+    """Выводит отпечатки моделей и долю данных, общую для нескольких файлов."""
+    filepaths = sorted(
+        os.path.join(directory, filename)
+        for filename in os.listdir(directory)
+        if filename.lower().endswith(SUPPORTED_FORMATS)
+    )
+    if not filepaths:
+        print("Файлы моделей не найдены.")
+        return
+
+    total_bytes = 0
+    unique_chunks = {}
+
+    for file_path in filepaths:
+        digests = chunk_digests(file_path)
+        for digest, size in digests:
+            total_bytes += size
+            unique_chunks[digest] = size
+
+        root = merkle_root([digest for digest, _ in digests])
+        print(f"{root.hex()[:16]}  {len(digests):6d} чанков  {os.path.basename(file_path)}")
+
+    unique_bytes = sum(unique_chunks.values())
+    print("\n" + "=" * 50)
+    print(f"Всего данных: {total_bytes / 2 ** 20:.1f} МиБ")
+    print(f"Уникальных данных: {unique_bytes / 2 ** 20:.1f} МиБ")
+    if total_bytes:
+        print(f"Экономия при дедупликации чанков: {1 - unique_bytes / total_bytes:.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Контентные отпечатки GLB/STL моделей и оценка дедупликации по чанкам'
+    )
+    parser.add_argument('directory', help='Директория с моделями')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.directory):
+        print(f"Ошибка: '{args.directory}' не является директорией")
+        exit(1)
+
+    analyze_directory(args.directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,26 @@
 import os
+import concurrent.futures
+from collections import Counter
 from PIL import Image
 import argparse
 
+# Попытка импорта NumPy для векторного поиска плашки (опционально)
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+# Попытка импорта numba для JIT-компиляции поиска плашки (опционально)
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+# Высота полосы строк, обрабатываемой за один шаг векторного поиска плашки
+CROP_SCAN_BAND = 64
+
 
 def is_dark_pixel(r, g, b, tolerance=25, max_val=120):
     """Проверяет, является ли пиксель темным (серым/черным)"""
@@ -11,27 +30,136 @@ def is_dark_pixel(r, g, b, tolerance=25, max_val=120):
     return r <= max_val and g <= max_val and b <= max_val
 
 
-def find_crop_height(img):
-    """Определяет высоту обрезки, находя темную плашку внизу"""
+def dark_pixel_mask(arr, tolerance=25, max_val=120):
+    """Векторная версия is_dark_pixel: маска темных пикселей для массива HxWx3"""
+    arr = arr.astype(np.int16, copy=False)
+    r, g, b = arr[..., 0], arr[..., 1], arr[..., 2]
+    gray = (np.abs(r - g) <= tolerance) & (np.abs(r - b) <= tolerance) & (np.abs(g - b) <= tolerance)
+    return gray & (r <= max_val) & (g <= max_val) & (b <= max_val)
+
+
+if HAS_NUMBA:
+    # Без parallel=True: файлы уже обрабатываются параллельно в пуле процессов,
+    # а потоки numba в каждом процессе дали бы cpu_count² потоков
+    @njit(cache=True)
+    def _find_crop_height_nb(arr, tolerance, max_val, threshold):
+        """JIT-версия find_crop_height с ранним выходом на первой строке без плашки"""
+        height, width = arr.shape[0], arr.shape[1]
+
+        # SWAR-проверка "все каналы <= max_val" для пикселя, упакованного в 0x00RRGGBB:
+        # к младшим 7 битам каждого байта добавляется (127 - max_val) без переноса
+        # между байтами, и канал больше max_val тогда и только тогда, когда
+        # у него выставлен старший бит исходного или полученного значения.
+        use_swar = max_val < 128
+        bias = (127 - max_val) * 0x010101 if use_swar else 0
+
+        for y in range(height - 1, -1, -1):
+            dark_pixels = 0
+            for x in range(width):
+                r = np.int16(arr[y, x, 0])
+                g = np.int16(arr[y, x, 1])
+                b = np.int16(arr[y, x, 2])
+
+                if use_swar:
+                    px = (np.int64(r) << 16) | (np.int64(g) << 8) | np.int64(b)
+                    within_max = ((((px & 0x7F7F7F) + bias) | px) & 0x808080) == 0
+                else:
+                    within_max = r <= max_val and g <= max_val and b <= max_val
+
+                if within_max and abs(r - g) <= tolerance and abs(r - b) <= tolerance and abs(g - b) <= tolerance:
+                    dark_pixels += 1
+
+            if dark_pixels / width < threshold:
+                return y + 1
+
+        return height
+
+
+def _find_crop_height_bytes(img):
+    """Версия find_crop_height без NumPy: один вызов tobytes() вместо getpixel() на пиксель"""
     width, height = img.size
-    crop_y = height
+    raw = memoryview(img.tobytes())
+    stride = width * 3
+
+    # Если 70% пикселей строки темные - считаем строку частью плашки.
+    # Строка перестает быть плашкой, как только светлых пикселей больше max_light.
+    min_dark = next(d for d in range(width + 1) if d / width >= 0.7)
+    max_light = width - min_dark
 
     # Проверяем строки снизу вверх
     for y in range(height - 1, -1, -1):
-        dark_pixels = 0
-        for x in range(width):
-            r, g, b = img.getpixel((x, y))
-            if is_dark_pixel(r, g, b):
-                dark_pixels += 1
-
-        # Если 70% пикселей строки темные - считаем строку частью плашки
-        if dark_pixels / width >= 0.7:
-            continue
-        else:
-            crop_y = y + 1
-            break
+        row = raw[y * stride:(y + 1) * stride]
+        light_pixels = 0
+        for r, g, b in zip(row[0::3], row[1::3], row[2::3]):
+            if not is_dark_pixel(r, g, b):
+                light_pixels += 1
+                if light_pixels > max_light:
+                    return y + 1
+
+    return height
+
+
+def find_crop_height(img):
+    """Определяет высоту обрезки, находя темную плашку внизу"""
+    if not HAS_NUMPY:
+        return _find_crop_height_bytes(img)
+
+    if HAS_NUMBA:
+        arr = np.ascontiguousarray(np.asarray(img, dtype=np.uint8))
+        return int(_find_crop_height_nb(arr, 25, 120, 0.7))
 
-    return crop_y
+    arr = np.asarray(img)
+    height = arr.shape[0]
+
+    # Маску считаем полосами снизу вверх и останавливаемся на первой полосе,
+    # где есть строка без плашки: верх изображения обычно не сканируется вовсе
+    for stop in range(height, 0, -CROP_SCAN_BAND):
+        start = max(0, stop - CROP_SCAN_BAND)
+
+        # Доля темных пикселей в каждой строке полосы
+        row_frac = dark_pixel_mask(arr[start:stop]).mean(axis=1)
+
+        # Если 70% пикселей строки темные - считаем строку частью плашки.
+        # Ищем снизу вверх первую строку, не являющуюся плашкой.
+        not_plaque = row_frac[::-1] < 0.7
+        if not_plaque.any():
+            return stop - int(np.argmax(not_plaque))
+
+    return height
+
+
+def _process_one(filepath):
+    """Обрабатывает одно изображение. Возвращает (статус, процент обрезки, сообщение)"""
+    directory, filename = os.path.split(filepath)
+
+    try:
+        with Image.open(filepath) as img:
+            # Конвертируем в RGB для единообразной обработки (без лишней копии для RGB)
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+            original_width, original_height = img.size
+            crop_y = find_crop_height(img)
+
+            # Обрезаем только если найдена плашка (минимум 20 пикселей)
+            if crop_y < img.height and (img.height - crop_y) > 20:
+                cropped_img = img.crop((0, 0, img.width, crop_y))
+                new_width, new_height = cropped_img.size
+
+                # Рассчитываем процент обрезанной высоты
+                cropped_pixels = original_height - crop_y
+                crop_percentage = (cropped_pixels / original_height) * 100
+
+                new_filename = f"crop_{filename}"
+                new_filepath = os.path.join(directory, new_filename)
+                cropped_img.save(new_filepath)
+                return ('cropped', crop_percentage,
+                        f"Обработано: {filename} -> {new_filename} | Размер: {original_width}x{original_height} -> {new_width}x{new_height} | Обрезано: {cropped_pixels}px ({crop_percentage:.2f}%)")
+
+            return ('skipped', None,
+                    f"Пропущено (нет плашки): {filename} | Размер: {original_width}x{original_height}")
+
+    except Exception as e:
+        return ('error', None, f"Ошибка при обработке {filename}: {str(e)}")
 
 
 def process_images(directory):
@@ -42,43 +170,29 @@ def process_images(directory):
     skipped_count = 0
     crop_percentages = []
 
-    for filename in os.listdir(directory):
-        if not filename.lower().endswith(supported_formats):
-            continue
-
-        filepath = os.path.join(directory, filename)
-
-        try:
-            with Image.open(filepath) as img:
-                # Конвертируем в RGB для единообразной обработки
-                img = img.convert('RGB')
-                original_width, original_height = img.size
-                crop_y = find_crop_height(img)
-
-                # Обрезаем только если найдена плашка (минимум 20 пикселей)
-                if crop_y < img.height and (img.height - crop_y) > 20:
-                    cropped_img = img.crop((0, 0, img.width, crop_y))
-                    new_width, new_height = cropped_img.size
-
-                    # Рассчитываем процент обрезанной высоты
-                    cropped_pixels = original_height - crop_y
-                    crop_percentage = (cropped_pixels / original_height) * 100
-                    crop_percentages.append(crop_percentage)
-
-                    new_filename = f"crop_{filename}"
-                    new_filepath = os.path.join(directory, new_filename)
-                    cropped_img.save(new_filepath)
-                    print(
-                        f"Обработано: {filename} -> {new_filename} | Размер: {original_width}x{original_height} -> {new_width}x{new_height} | Обрезано: {cropped_pixels}px ({crop_percentage:.2f}%)")
-                    cropped_count += 1
-                else:
-                    print(f"Пропущено (нет плашки): {filename} | Размер: {original_width}x{original_height}")
-                    skipped_count += 1
-
-                total_processed += 1
-
-        except Exception as e:
-            print(f"Ошибка при обработке {filename}: {str(e)}")
+    filepaths = [
+        os.path.join(directory, filename)
+        for filename in os.listdir(directory)
+        if filename.lower().endswith(supported_formats)
+    ]
+
+    # Файлы независимы друг от друга, поэтому обрабатываем их в пуле процессов.
+    # Размер порции по объему работы, чтобы на небольшом наборе были заняты все ядра.
+    workers = os.cpu_count() or 1
+    chunksize = max(1, min(4, -(-len(filepaths) // workers)))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as ex:
+        for status, crop_percentage, message in ex.map(_process_one, filepaths, chunksize=chunksize):
+            print(message)
+            if status == 'error':
+                continue
+
+            if status == 'cropped':
+                crop_percentages.append(crop_percentage)
+                cropped_count += 1
+            else:
+                skipped_count += 1
+
+            total_processed += 1
 
     # Вывод сводной аналитики
     if total_processed > 0:
@@ -100,14 +214,12 @@ def process_images(directory):
             print(f"Средний процент обрезки: {avg_percent:.2f}%")
 
             # Подсчет конкретных значений с округлением до 1 знака после запятой
-            percentage_counts = {}
-            for p in crop_percentages:
-                # Округляем до 1 знака после запятой для группировки
-                rounded_p = round(p, 1)
-                percentage_counts[rounded_p] = percentage_counts.get(rounded_p, 0) + 1
-
-            # Сортируем по процентам
-            sorted_percentages = sorted(percentage_counts.items())
+            # (np.unique сразу сортирует и считает повторы)
+            if HAS_NUMPY:
+                percents, counts = np.unique(np.round(np.asarray(crop_percentages), 1), return_counts=True)
+                sorted_percentages = zip(percents.tolist(), counts.tolist())
+            else:
+                sorted_percentages = sorted(Counter(round(p, 1) for p in crop_percentages).items())
 
             print("\nРаспределение по конкретным процентам обрезки:")
             for percent, count in sorted_percentages:
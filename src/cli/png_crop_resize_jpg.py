@@ -1,9 +1,19 @@
 import argparse
+import functools
+import io
 import os
 import sys
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import numpy as np
 from PIL import Image
 from typing import Tuple, Optional, List
-import glob
+
+# Попытка импорта OpenCV для быстрой обработки (опционально)
+try:
+    import cv2
+    HAS_CV2 = True
+except ImportError:
+    HAS_CV2 = False
 
 # Константы
 RESOLUTIONS = (
@@ -26,6 +36,15 @@ BACKGROUND_COLORS = {
     "very_dark": (16, 16, 12)
 }
 
+# Наибольшее количество файлов, которое один процесс обрабатывает за задачу
+MAX_BATCH_SIZE = 4
+
+# Фоновый поток чтения исходных файлов с диска
+_reader = ThreadPoolExecutor(max_workers=1)
+
+# Фоновые потоки кодирования JPEG (libjpeg отпускает GIL)
+_writer = ThreadPoolExecutor(max_workers=2)
+
 
 def find_png_files(source_path: str, recursive: bool = False) -> List[str]:
     """
@@ -36,7 +55,8 @@ def find_png_files(source_path: str, recursive: bool = False) -> List[str]:
         recursive: Рекурсивно искать в поддиректориях
 
     Returns:
-        Список путей к PNG файлам
+        Список путей к PNG файлам. Пути уже проверены (существуют и имеют
+        расширение .png), повторная проверка не нужна.
     """
     if os.path.isfile(source_path):
         if source_path.lower().endswith('.png'):
@@ -45,12 +65,20 @@ def find_png_files(source_path: str, recursive: bool = False) -> List[str]:
             raise ValueError(f"File must be PNG: {source_path}")
 
     if os.path.isdir(source_path):
-        if recursive:
-            pattern = os.path.join(source_path, "**", "*.png")
-            png_files = glob.glob(pattern, recursive=True)
-        else:
-            pattern = os.path.join(source_path, "*.png")
-            png_files = glob.glob(pattern)
+        # Обход через os.scandir: DirEntry кэширует тип записи, лишних stat нет.
+        # Скрытые файлы и каталоги пропускаются, как и раньше при glob.
+        png_files = []
+        stack = [source_path]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            stack.append(entry.path)
+                    elif entry.name.lower().endswith('.png') and entry.is_file():
+                        png_files.append(entry.path)
 
         if not png_files:
             raise FileNotFoundError(f"No PNG files found in directory: {source_path}")
@@ -69,12 +97,6 @@ def validate_input(source_path: str) -> None:
         raise ValueError("Input file must be a PNG image (extension .png)")
 
 
-def validate_input_list(source_paths: List[str]) -> None:
-    """Проверяет корректность списка входных файлов."""
-    for source_path in source_paths:
-        validate_input(source_path)
-
-
 def validate_output(output_path: str, force: bool) -> None:
     """Проверяет возможность записи выходного файла."""
     if os.path.exists(output_path) and not force:
@@ -84,13 +106,181 @@ def validate_output(output_path: str, force: bool) -> None:
         )
 
 
+@functools.lru_cache(maxsize=None)
+def _bg_template(
+        target_size: Tuple[int, int],
+        background_color: Tuple[int, int, int]
+) -> np.ndarray:
+    """
+    Заливка фона для пары (размер, цвет), общая для всех файлов пакета.
+
+    Шаблон только для чтения: перед смешиванием берется его копия.
+    """
+    target_width, target_height = target_size
+    template = np.full((target_height, target_width, 3), background_color, dtype=np.uint8)
+    template.flags.writeable = False
+    return template
+
+
+def _crop_to_content(img: Image.Image) -> np.ndarray:
+    """
+    Декодирует изображение один раз и обрезает его по альфа-каналу.
+
+    Все дальнейшие шаги работают с полученным массивом, без повторных
+    обращений к PIL-изображению.
+
+    Returns:
+        RGBA-массив, обрезанный по видимому содержимому
+    """
+    img.load()
+    arr = np.asarray(img if img.mode == "RGBA" else img.convert("RGBA"))
+
+    # Проверка содержимого и bbox по альфа-каналу
+    alpha = arr[..., 3]
+    rows = np.flatnonzero(alpha.any(axis=1))
+    if rows.size == 0:
+        raise ValueError("Image is fully transparent (no visible content)")
+    cols = np.flatnonzero(alpha.any(axis=0))
+
+    return arr[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+
+
+def _fit_size(cropped: np.ndarray, target_size: Tuple[int, int]) -> Tuple[int, int]:
+    """Размер (ширина, высота), вписанный в target_size с сохранением пропорций."""
+    target_width, target_height = target_size
+    orig_height, orig_width = cropped.shape[:2]
+    scale_ratio = min(
+        target_width / orig_width,
+        target_height / orig_height
+    )
+    return (
+        int(orig_width * scale_ratio),
+        int(orig_height * scale_ratio)
+    )
+
+
+def _process_image_pil(
+        cropped: np.ndarray,
+        target_size: Tuple[int, int],
+        background_color: Tuple[int, int, int]
+) -> np.ndarray:
+    """Масштабирование средствами Pillow и наложение на фон. Возвращает RGB-холст."""
+    target_width, target_height = target_size
+    new_size = _fit_size(cropped, target_size)
+
+    # reducing_gap: при сильном уменьшении Pillow сначала быстро сжимает
+    # изображение box-фильтром до 3x от целевого размера, а LANCZOS
+    # применяет уже к уменьшенной копии
+    resized = np.asarray(
+        Image.fromarray(cropped, "RGBA").resize(new_size, Image.LANCZOS, reducing_gap=3.0)
+    )
+
+    # Фон и целочисленное смешивание только в области вставки:
+    # dst = (fg * a + bg * (255 - a)) / 255
+    canvas = _bg_template(target_size, background_color).copy()
+    x = (target_width - new_size[0]) // 2
+    y = (target_height - new_size[1]) // 2
+    region = canvas[y:y + new_size[1], x:x + new_size[0]]
+    a = resized[..., 3:4].astype(np.uint16)
+    rgb = resized[..., :3].astype(np.uint16)
+    region[:] = ((rgb * a + region * (255 - a) + 127) // 255).astype(np.uint8)
+
+    return canvas
+
+
+def _process_image_cv2(
+        cropped: np.ndarray,
+        target_size: Tuple[int, int],
+        background_color: Tuple[int, int, int]
+) -> np.ndarray:
+    """
+    Масштабирование средствами OpenCV и наложение на фон. Возвращает RGB-холст.
+
+    Смешивание с фоном идет прямо в заранее выделенном холсте.
+    """
+    target_width, target_height = target_size
+    new_size = _fit_size(cropped, target_size)
+
+    # Ресайз в premultiplied alpha (как в Pillow), чтобы не было ореолов по краям.
+    # INTER_LANCZOS4 не сглаживает при уменьшении, поэтому для него берем INTER_AREA.
+    premultiplied = cv2.cvtColor(cropped, cv2.COLOR_RGBA2mRGBA)
+    interpolation = cv2.INTER_AREA if new_size[0] < cropped.shape[1] else cv2.INTER_LANCZOS4
+    resized = cv2.resize(premultiplied, new_size, interpolation=interpolation)
+
+    # Фон и целочисленное смешивание (цвет уже умножен на альфу):
+    # dst = fg + bg * (255 - a) / 255
+    canvas = _bg_template(target_size, background_color).copy()
+    x = (target_width - new_size[0]) // 2
+    y = (target_height - new_size[1]) // 2
+    region = canvas[y:y + new_size[1], x:x + new_size[0]]
+    a = resized[..., 3:4].astype(np.uint16)
+    blended = resized[..., :3] + (region * (255 - a) + 127) // 255
+    region[:] = np.minimum(blended, 255).astype(np.uint8)
+
+    return canvas
+
+
+def save_jpeg(image: np.ndarray, output_path: str, force: bool = True) -> None:
+    """
+    Кодирует RGB-холст в JPEG и сохраняет его.
+
+    Однопроходное кодирование: без оптимизации таблиц Хаффмана и без
+    progressive, цветность 4:2:0. Без force файл создается эксклюзивно:
+    если он появился после validate_output, запись завершается ошибкой.
+    """
+    if HAS_CV2:
+        # imencode вместо imwrite: формат не зависит от расширения пути
+        ok, encoded = cv2.imencode(
+            ".jpg",
+            cv2.cvtColor(image, cv2.COLOR_RGB2BGR),
+            [
+                cv2.IMWRITE_JPEG_QUALITY, 93,
+                cv2.IMWRITE_JPEG_OPTIMIZE, 0,
+                cv2.IMWRITE_JPEG_PROGRESSIVE, 0,
+                cv2.IMWRITE_JPEG_SAMPLING_FACTOR, cv2.IMWRITE_JPEG_SAMPLING_FACTOR_420
+            ]
+        )
+        if not ok:
+            raise ValueError("JPEG encoding failed")
+        data = encoded.tobytes()
+    else:
+        buffer = io.BytesIO()
+        Image.fromarray(image).save(
+            buffer,
+            "JPEG",
+            quality=93,
+            optimize=False,
+            progressive=False,
+            subsampling=2
+        )
+        data = buffer.getvalue()
+
+    # Файл открывается только после успешного кодирования
+    try:
+        with open(output_path, "wb" if force else "xb") as f:
+            f.write(data)
+    except FileExistsError:
+        raise FileExistsError(
+            f"Output file already exists: {output_path}\n"
+            "Use -f or --force to overwrite."
+        ) from None
+
+
+def _read_file(path: str) -> bytes:
+    """Читает файл целиком (выполняется в потоке чтения)."""
+    with open(path, "rb") as f:
+        return f.read()
+
+
 def process_image(
         source_path: str,
         output_path: str,
         target_size: Tuple[int, int],
         background_color: Tuple[int, int, int],
-        force: bool
-) -> None:
+        force: bool,
+        writer: Optional[Executor] = None,
+        source_data: Optional[bytes] = None
+) -> Optional[Future]:
     """
     Обрабатывает изображение: обрезка, масштабирование, сохранение.
 
@@ -100,6 +290,10 @@ def process_image(
         target_size: Целевой размер (ширина, высота)
         background_color: Цвет фона в формате RGB
         force: Разрешить перезапись существующих файлов
+        writer: Пул для фонового кодирования JPEG. Если задан, сохранение
+            ставится в очередь и функция сразу возвращает его Future
+        source_data: Уже прочитанное содержимое source_path. Если задано,
+            файл повторно с диска не читается
 
     Raises:
         Exception: При возникновении ошибок обработки
@@ -111,44 +305,79 @@ def process_image(
     target_width, target_height = target_size
 
     try:
-        with Image.open(source_path) as img:
+        source = io.BytesIO(source_data) if source_data is not None else source_path
+        with Image.open(source) as img:
             # Проверка формата
             if "A" not in img.mode:
                 raise ValueError(
                     f"Input image must have alpha channel (RGBA). Current mode: {img.mode}"
                 )
 
-            # Проверка содержимого
-            if img.getbbox() is None:
-                raise ValueError("Image is fully transparent (no visible content)")
+            cropped = _crop_to_content(img)
 
-            # Обрезка и масштабирование
-            cropped = img.crop(img.getbbox())
-            orig_width, orig_height = cropped.size
-            scale_ratio = min(
-                target_width / orig_width,
-                target_height / orig_height
-            )
-            new_size = (
-                int(orig_width * scale_ratio),
-                int(orig_height * scale_ratio)
-            )
-            resized = cropped.resize(new_size, Image.LANCZOS)
+        if HAS_CV2:
+            result = _process_image_cv2(cropped, target_size, background_color)
+        else:
+            result = _process_image_pil(cropped, target_size, background_color)
 
-            # Создание фона и размещение изображения
-            background = Image.new("RGB", (target_width, target_height), background_color)
-            x = (target_width - new_size[0]) // 2
-            y = (target_height - new_size[1]) // 2
-            background.paste(resized, (x, y), resized)
+        # Кадр остается жив в замыкании задачи, пока кодирование не завершится
+        if writer is not None:
+            return writer.submit(save_jpeg, result, output_path, force)
 
-            # Сохранение
-            background.save(output_path, "JPEG", quality=93)
-            print(f"✓ Saved: {output_path} | Size: {target_width}x{target_height}")
+        save_jpeg(result, output_path, force)
+        print(f"✓ Saved: {output_path} | Size: {target_width}x{target_height}")
+        return None
 
     except Exception as e:
         raise RuntimeError(f"Processing error: {str(e)}") from e
 
 
+def process_batch(
+        tasks: List[Tuple[str, str]],
+        target_size: Tuple[int, int],
+        background_color: Tuple[int, int, int],
+        force: bool
+) -> List[Tuple[str, Optional[str]]]:
+    """
+    Обрабатывает группу файлов в одном процессе.
+
+    Работает как конвейер из трех стадий: поток чтения загружает файлы
+    группы с диска, текущий поток декодирует, обрезает и масштабирует их,
+    а кодирование и запись JPEG уходят в потоки записи.
+
+    Returns:
+        Список (путь к PNG, текст ошибки или None)
+    """
+    results = []
+    pending = []
+
+    reads = [_reader.submit(_read_file, png_file) for png_file, _ in tasks]
+
+    for (png_file, output_path), read in zip(tasks, reads):
+        try:
+            pending.append((png_file, output_path, process_image(
+                png_file,
+                output_path,
+                target_size,
+                background_color,
+                force,
+                writer=_writer,
+                source_data=read.result()
+            )))
+        except Exception as e:
+            results.append((png_file, str(e)))
+
+    for png_file, output_path, future in pending:
+        try:
+            future.result()
+            print(f"✓ Saved: {output_path} | Size: {target_size[0]}x{target_size[1]}")
+            results.append((png_file, None))
+        except Exception as e:
+            results.append((png_file, f"Processing error: {str(e)}"))
+
+    return results
+
+
 def get_output_path(
         source_path: str,
         output_arg: Optional[str],
@@ -215,7 +444,6 @@ def main():
     source_path = os.path.abspath(args.source)
     try:
         png_files = find_png_files(source_path, args.recursive)
-        validate_input_list(png_files)
     except Exception as e:
         print(f"✗ Failed to find PNG files: {str(e)}", file=sys.stderr)
         sys.exit(1)
@@ -224,29 +452,54 @@ def main():
     successful = 0
     failed = 0
 
+    # Несколько исходников с одним выходным путем (например, a/x.png и b/x.png
+    # при -d каталог) обрабатываются параллельно и перезаписали бы друг друга:
+    # обрабатываем только первый, остальные считаем ошибкой
+    tasks = []
+    output_owners = {}
     for png_file in png_files:
-        try:
-            output_path = get_output_path(
-                png_file,
-                args.destination,
-                width,
-                height
+        output_path = get_output_path(png_file, args.destination, width, height)
+        key = os.path.normcase(os.path.abspath(output_path))
+        owner = output_owners.setdefault(key, png_file)
+        if owner != png_file:
+            print(
+                f"✗ Failed to process {os.path.basename(png_file)}: "
+                f"Output path {output_path} is already used by {owner}",
+                file=sys.stderr
             )
-
-            print(f"Processing: {os.path.basename(png_file)}")
-
-            process_image(
-                png_file,
-                output_path,
+            failed += 1
+            continue
+        tasks.append((png_file, output_path))
+    # Размер группы по объему работы: все ядра заняты даже на небольшом наборе,
+    # а на большом группа все равно дает потоку записи что перекрывать
+    workers = os.cpu_count() or 1
+    batch_size = min(MAX_BATCH_SIZE, max(1, -(-len(tasks) // workers)))
+    batches = [tasks[i:i + batch_size] for i in range(0, len(tasks), batch_size)]
+
+    # Группы файлов независимы, поэтому обрабатываются параллельно в пуле процессов
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                process_batch,
+                batch,
                 (width, height),
                 background_color,
                 args.force
-            )
-            successful += 1
-
-        except Exception as e:
-            print(f"✗ Failed to process {os.path.basename(png_file)}: {str(e)}", file=sys.stderr)
-            failed += 1
+            ): batch for batch in batches
+        }
+
+        for future in as_completed(futures):
+            try:
+                results = future.result()
+            except Exception as e:
+                results = [(png_file, str(e)) for png_file, _ in futures[future]]
+
+            for png_file, error in results:
+                if error is None:
+                    successful += 1
+                else:
+                    print(f"✗ Failed to process {os.path.basename(png_file)}: {error}", file=sys.stderr)
+                    failed += 1
 
     # Итоговая статистика
     print(f"\nProcessing complete: {successful} successful, {failed} failed out of {len(png_files)} total files")
@@ -0,0 +1,25 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "cli"))
+
+import asset_cache  # noqa: E402
+
+
+def test_empty_file_has_no_chunks_and_empty_leaf_fingerprint(tmp_path):
+    empty = tmp_path / "empty.glb"
+    empty.write_bytes(b"")
+
+    assert asset_cache.chunk_digests(str(empty)) == []
+    assert asset_cache.fingerprint(str(empty)) == asset_cache.hash_chunk(b"")
+
+
+def test_analyze_directory_with_empty_file(tmp_path, capsys):
+    (tmp_path / "empty.stl").write_bytes(b"")
+    (tmp_path / "model.glb").write_bytes(os.urandom(1000))
+
+    asset_cache.analyze_directory(str(tmp_path))
+
+    out = capsys.readouterr().out
+    assert "empty.stl" in out
+    assert "model.glb" in out